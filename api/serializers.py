@@ -6,4 +6,14 @@ class URLSerializer(serializers.Serializer):
     Accepts a URL as a simple string. The logic layer will handle
     adding a scheme if it's missing.
     """
-    url = serializers.CharField(required=True, trim_whitespace=True)
\ No newline at end of file
+    url = serializers.CharField(required=True, trim_whitespace=True)
+
+class URLBatchSerializer(serializers.Serializer):
+    """
+    Accepts a list of URL strings for batch classification.
+    """
+    urls = serializers.ListField(
+        child=serializers.CharField(trim_whitespace=True),
+        allow_empty=False,
+        max_length=50,
+    )
\ No newline at end of file
@@ -1,3 +1,57 @@
+from unittest import mock
+
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from predictor import predictor_logic
+from predictor.tests import FakeModel, fake_artifacts, fake_response
+
+
+class PredictURLBatchViewTests(TestCase):
+    def setUp(self):
+        for cache in (predictor_logic._PREDICTION_CACHE, predictor_logic._CONTENT_CACHE):
+            if cache is not None:
+                cache.clear()
+        self.model = FakeModel(proba=0.1)
+        for patcher in (
+            mock.patch.object(predictor_logic, '_load_artifacts', return_value=fake_artifacts(self.model)),
+            mock.patch.object(predictor_logic._SESSION, 'get', side_effect=lambda url, **kw: fake_response(url)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def post(self, urls):
+        return self.client.post(reverse('predict-url-batch'), {'urls': urls}, format='json')
+
+    def test_results_follow_input_order(self):
+        urls = ['https://shop.example.com/', 'https://secure-login.example.com/']
+
+        response = self.post(urls)
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([r['url'] for r in results], urls)
+        self.assertEqual([r['prediction'] for r in results], ['Legitimate ✅', 'Phishing 🚨'])
+
+    def test_malformed_url_gets_an_error_entry(self):
+        response = self.post(['https://shop.example.com/', 'https://[::1', 'https://news.example.com/'])
+
+        self.assertEqual(response.status_code, 200)
+        good, bad, other = response.json()['results']
+        self.assertEqual(good['prediction'], 'Legitimate ✅')
+        self.assertIn('error', bad)
+        self.assertEqual(bad['url'], 'https://[::1')
+        self.assertEqual(other['prediction'], 'Legitimate ✅')
+
+    def test_repeated_url_is_fetched_once(self):
+        response = self.post(['https://shop.example.com/'] * 3)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+        predictor_logic._SESSION.get.assert_called_once()
 
-# Create your tests here.
+    def test_rejects_empty_and_oversized_batches(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post(['https://example.com/'] * 51).status_code, 400)
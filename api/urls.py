@@ -1,7 +1,8 @@
 # api/urls.py
 from django.urls import path
-from .views import PredictURLView
+from .views import PredictURLView, PredictURLBatchView
 
 urlpatterns = [
     path('predict/', PredictURLView.as_view(), name='predict-url'),
+    path('predict_batch/', PredictURLBatchView.as_view(), name='predict-url-batch'),
 ]
\ No newline at end of file
@@ -5,8 +5,8 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .serializers import URLSerializer
-from predictor.predictor_logic import predict_url_class
+from .serializers import URLSerializer, URLBatchSerializer
+from predictor.predictor_logic import predict_url_class, predict_url_classes
 
 class PredictURLView(APIView):
     def post(self, request, *args, **kwargs):
@@ -15,5 +15,14 @@ class PredictURLView(APIView):
             url_to_check = serializer.validated_data['url']
             result = predict_url_class(url_to_check)
             return Response(result, status=status.HTTP_200_OK)
+        else:
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class PredictURLBatchView(APIView):
+    def post(self, request, *args, **kwargs):
+        serializer = URLBatchSerializer(data=request.data)
+        if serializer.is_valid():
+            results = predict_url_classes(serializer.validated_data['urls'])
+            return Response({"results": results}, status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class PredictorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'predictor'
+
+    def ready(self):
+        # Warm the model artifacts at startup so the first request does not pay for joblib.load.
+        from .predictor_logic import _load_artifacts
+        try:
+            _load_artifacts()
+        except Exception:
+            # Missing/unreadable artifacts are reported per request by predict_url_class.
+            pass
@@ -0,0 +1,38 @@
+# predictor/management/commands/export_onnx.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor.predictor_logic import ONNX_MODEL_FILE, _load_artifacts, model_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert the trained RandomForest to ONNX so predictions run through "
+        "onnxruntime. Requires: pip install skl2onnx onnxruntime"
+    )
+
+    def handle(self, *args, **options):
+        try:
+            from skl2onnx import convert_sklearn
+            from skl2onnx.common.data_types import FloatTensorType
+        except ImportError:
+            raise CommandError("skl2onnx is not installed. Run: pip install skl2onnx")
+
+        try:
+            artifacts = _load_artifacts()
+        except FileNotFoundError as exc:
+            raise CommandError(f"Model artifacts not found: {exc}")
+
+        # zipmap=False keeps probabilities as a plain (n, 2) tensor instead of a list of dicts.
+        model = artifacts.model
+        onx = convert_sklearn(
+            model,
+            initial_types=[('X', FloatTensorType([None, len(artifacts.ordered_features)]))],
+            options={id(model): {'zipmap': False}},
+        )
+
+        out_path = os.path.join(model_dir(), ONNX_MODEL_FILE)
+        with open(out_path, 'wb') as f:
+            f.write(onx.SerializeToString())
+        self.stdout.write(self.style.SUCCESS(f"Wrote {out_path}. Restart the server to pick it up."))
@@ -1,11 +1,19 @@
 # predictor/predictor_logic.py
 
 import re
+import functools
+import html
+import http.cookiejar
+import ipaddress
 import joblib
-import pandas as pd
+import numpy as np
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
 import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 from django.conf import settings
@@ -17,13 +25,49 @@ except ImportError:
     tldextract = None
     print("Info: tldextract not found. Falling back to simple domain parsing.")
 
-# Gracefully import the Levenshtein library. If not found, disable typosquatting check.
+# Optional: TTL cache for fetched page content features
+try:
+    from cachetools import TTLCache
+except ImportError:
+    TTLCache = None
+    print("Info: cachetools not found. Page content features will not be cached.")
+
+# Optional: ONNX Runtime for compiled RandomForest inference (see `manage.py export_onnx`)
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+# Optional: C-based HTML parser for BeautifulSoup (much faster than html.parser)
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+    print("Info: lxml not found. Falling back to the built-in html.parser.")
+
+# Prefer RapidFuzz for typosquatting: it scores all targets in one C++ call.
+try:
+    from rapidfuzz import process as rf_process
+    from rapidfuzz.distance import Levenshtein as RFLevenshtein
+except ImportError:
+    rf_process = None
+
+# Gracefully import the Levenshtein library. If neither is found, disable typosquatting check.
 try:
     from Levenshtein import distance as levenshtein_distance
 except ImportError:
-    print("Warning: Levenshtein library not found. Typosquatting detection will be disabled.")
-    print("To enable, run: pip install python-Levenshtein")
     levenshtein_distance = None
+    if rf_process is None:
+        print("Warning: Levenshtein library not found. Typosquatting detection will be disabled.")
+        print("To enable, run: pip install rapidfuzz")
+
+# Optional: single-pass multi-keyword matching (Aho-Corasick automaton)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+    print("Info: pyahocorasick not found. Falling back to regex keyword matching.")
 
 # Suppress only the InsecureRequestWarning from urllib3 (kept for compatibility)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -79,6 +123,11 @@ TARGET_DOMAINS = [
     'phonepe', 'flipkart', 'myntra', 'hotstar'
 ]
 
+# Precomputed lookups for the typosquatting check
+TARGET_SET = frozenset(TARGET_DOMAINS)
+TARGET_CHOICES = tuple(dict.fromkeys(TARGET_DOMAINS))  # De-duplicated, order preserved
+TARGET_LENS = [(t, len(t)) for t in TARGET_CHOICES]
+
 # Safe eTLD+1 domains for domain-aware thresholding
 SAFE_REG_DOMAINS = {
     'google.com', 'apple.com', 'microsoft.com', 'amazon.com', 'paypal.com',
@@ -86,8 +135,96 @@ SAFE_REG_DOMAINS = {
     'netflix.com', 'spotify.com', 'yahoo.com'
 }
 
+# Outbound fetch settings: fail fast on dead hosts (connect), but allow a slower body (read).
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+FETCH_TIMEOUT = (2, 4)
+MAX_BODY_BYTES = 512 * 1024  # Bounds download and parse cost on huge/malicious pages
+
+# One pooled session per process so keep-alive and TLS sessions are reused across fetches.
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+# Never store cookies: a shared jar would replay one scan's cookies to the same site on later
+# checks, which lets cloaking kits recognise a repeat visit and serve a benign page.
+_SESSION.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+for _prefix in ('https://', 'http://'):
+    _SESSION.mount(_prefix, HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0))
+
+# Recently computed content features, keyed by the requested URL (5-minute TTL).
+_CONTENT_CACHE = TTLCache(maxsize=1024, ttl=300) if TTLCache else None
+_CONTENT_CACHE_LOCK = threading.Lock()
+
+# Final prediction dicts, keyed by the submitted URL (5-minute TTL).
+_PREDICTION_CACHE = TTLCache(maxsize=4096, ttl=300) if TTLCache else None
+_PREDICTION_CACHE_LOCK = threading.Lock()
+
+# Shared pool for batch page fetches (I/O-bound; sockets release the GIL).
+_BATCH_POOL = ThreadPoolExecutor(max_workers=16)
+
+# URL-string features, in the order they are computed (names match features.txt)
+StringFeatures = namedtuple('StringFeatures', [
+    'NumDots', 'SubdomainLevel', 'PathLevel', 'UrlLength', 'NumDash',
+    'NumDashInHostname', 'AtSymbol', 'TildeSymbol', 'NumUnderscore', 'NumPercent',
+    'NumQueryComponents', 'NumAmpersand', 'NumHash', 'NumNumericChars', 'NoHttps',
+    'RandomString', 'IpAddress', 'DomainInSubdomains', 'DomainInPaths',
+    'HostnameLength', 'PathLength', 'QueryLength', 'DoubleSlashInPath',
+    'NumSensitiveWords',
+])
+
+# Real-Time (RT) model columns that mirror an already-computed feature: (alias, source)
+_RT_FEATURE_ALIASES = (
+    ('SubdomainLevelRT', 'SubdomainLevel'),
+    ('UrlLengthRT', 'UrlLength'),
+    ('PctExtResourceUrlsRT', 'PctExtResourceUrls'),
+    ('AbnormalExtFormActionR', 'AbnormalFormAction'),
+    ('ExtMetaScriptLinkRT', 'PctExtResourceUrls'),
+    ('PctExtNullSelfRedirectHyperlinksRT', 'PctNullSelfRedirectHyperlinks'),
+)
+
+# Keywords counted by the NumSensitiveWords feature
+SENSITIVE_WORDS = ('secure', 'account', 'webscr', 'login', 'ebayisapi', 'banking', 'confirm')
+
+# Precompiled patterns used on every request
+_RE_RANDOM_STRING = re.compile(r'[0-9a-f]{20}')  # Any run of 20+ hex chars contains one of exactly 20
+_RE_SENSITIVE = re.compile('|'.join(SENSITIVE_WORDS))
+
+# Page-source markers behind PopUpWindow, RightClickDisabled and SubmitInfoToEmail
+_MARKER_CHARS = frozenset('window.open(' 'oncontextmenu' 'event.button == 2' 'mailto:')
+_RE_CHAR_REF = re.compile(r'&(?:#x[0-9a-f]+|#[0-9]+|[a-z][a-z0-9]*);?')
+
+def _has_encoded_marker_chars(page_html: str) -> bool:
+    """
+    Return True if the (lowercased) page source has a character reference that decodes
+    to a character of the JS/mailto markers, e.g. href="&#109;ailto:" or w&#105;ndow.open(.
+    Such markers only match once the references are decoded.
+    """
+    for match in _RE_CHAR_REF.finditer(page_html):
+        if html.unescape(match.group()).lower() in _MARKER_CHARS:
+            return True
+    return False
+
 # --- Helper Functions ---
 
+def _build_automaton(words):
+    """Build an Aho-Corasick automaton whose payload for each keyword is the keyword itself."""
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+_SENSITIVE_AC = _build_automaton(SENSITIVE_WORDS) if ahocorasick else None
+_BRAND_AC = _build_automaton(TARGET_CHOICES) if ahocorasick else None
+
+def count_sensitive_words(text_lower: str) -> int:
+    """Return how many distinct SENSITIVE_WORDS occur in the (already lowercased) text."""
+    if _SENSITIVE_AC is not None:
+        return len({word for _, word in _SENSITIVE_AC.iter(text_lower)})
+    return len(set(_RE_SENSITIVE.findall(text_lower)))
+
 _SECOND_LEVEL_SUFFIXES = {
     # Common multi-label public suffixes (non-exhaustive fallback when tldextract is absent)
     'co.uk', 'org.uk', 'ac.uk', 'gov.uk',
@@ -111,16 +248,6 @@ def _fallback_extract_domain(hostname: str) -> str:
             return parts[-3]
     return parts[-2]
 
-def extract_domain(hostname: str) -> str:
-    """Extract registrable domain label only (e.g., 'google' from 'mail.google.co.uk')."""
-    if not hostname:
-        return ''
-    hostname = hostname.strip().lower()
-    if tldextract:
-        ext = tldextract.extract(hostname)
-        return ext.domain or _fallback_extract_domain(hostname)
-    return _fallback_extract_domain(hostname)
-
 def _fallback_extract_registered_domain(hostname: str) -> str:
     """Return eTLD+1 (e.g., 'google.com') using a simple heuristic."""
     if not hostname:
@@ -133,202 +260,408 @@ def _fallback_extract_registered_domain(hostname: str) -> str:
         return parts[-3] + '.' + tail2
     return tail2
 
+@functools.lru_cache(maxsize=4096)
+def _split_hostname(hostname: str):
+    """
+    Return (domain_label, registered_domain) for a normalized hostname, running
+    tldextract at most once per distinct hostname.
+    """
+    if tldextract:
+        ext = tldextract.extract(hostname)
+        domain = ext.domain or _fallback_extract_domain(hostname)
+        if ext.domain and ext.suffix:
+            return domain, f"{ext.domain}.{ext.suffix}"
+        return domain, _fallback_extract_registered_domain(hostname)
+    return _fallback_extract_domain(hostname), _fallback_extract_registered_domain(hostname)
+
+def extract_domain(hostname: str) -> str:
+    """Extract registrable domain label only (e.g., 'google' from 'mail.google.co.uk')."""
+    if not hostname:
+        return ''
+    return _split_hostname(hostname.strip().lower())[0]
+
 def get_registered_domain(hostname: str) -> str:
     """Return eTLD+1 (e.g., 'google.com')."""
     if not hostname:
         return ''
-    hostname = hostname.strip().lower()
-    if tldextract:
-        ext = tldextract.extract(hostname)
-        if ext.domain and ext.suffix:
-            return f"{ext.domain}.{ext.suffix}"
-    return _fallback_extract_registered_domain(hostname)
+    return _split_hostname(hostname.strip().lower())[1]
+
+def find_embedded_brand(page_text: str, hostname: str):
+    """Return a target brand mentioned in the (lowercased) page text but absent from hostname, or None."""
+    if _BRAND_AC is not None:
+        # One linear pass over the text for all brands at once
+        for _, brand in _BRAND_AC.iter(page_text):
+            if brand not in hostname:
+                return brand
+        return None
+    for brand in TARGET_CHOICES:
+        if brand in page_text and brand not in hostname:
+            return brand
+    return None
+
+def is_ip_address(hostname: str) -> bool:
+    """Return True if hostname is a literal IPv4/IPv6 address (octets validated to 0-255)."""
+    if not hostname:
+        return False
+    try:
+        ipaddress.ip_address(hostname)
+    except ValueError:
+        return False
+    return True
+
+def find_typosquat_target(domain: str):
+    """Return the TARGET_DOMAINS entry within edit distance 1-2 of domain, or None."""
+    # The brand itself is not a typosquat of some other, similar brand.
+    if domain in TARGET_SET:
+        return None
+    if rf_process is not None:
+        # Best (lowest-distance) target within the cutoff; an exact match means no typosquat.
+        match = rf_process.extractOne(domain, TARGET_CHOICES, scorer=RFLevenshtein.distance, score_cutoff=2)
+        return match[0] if match and match[1] > 0 else None
+    if levenshtein_distance:
+        domain_len = len(domain)
+        for target, target_len in TARGET_LENS:
+            # Edit distance is at least the length difference; skip hopeless targets.
+            if abs(domain_len - target_len) > 2:
+                continue
+            # score_cutoff lets the DP bail out once the distance exceeds 2
+            if 0 < levenshtein_distance(domain, target, score_cutoff=2) <= 2:
+                return target
+    return None
 
 def is_external(href: str, base_hostname: str) -> bool:
-    """Return True if href is absolute and points to a different hostname."""
+    """
+    Return True if href is absolute and points to a different hostname.
+    base_hostname must already be lowercase (as urlparse's .hostname is).
+    """
     if not href:
         return False
-    parsed = urlparse(href)
-    return bool(parsed.hostname) and parsed.hostname.lower() != (base_hostname or '').lower()
+    # A hostname needs a '//' authority, so relative, '#', '?', 'javascript:',
+    # 'mailto:' and 'data:' hrefs are ruled out without parsing. urlparse (like
+    # browsers) drops tab, CR and LF anywhere in the URL, so '/\n/evil.example'
+    # still names a host; hrefs containing those always go through the parse.
+    if '//' not in href and not ('\t' in href or '\r' in href or '\n' in href):
+        return False
+    # .hostname is recomputed from netloc on every access, so read it once.
+    href_hostname = urlparse(href).hostname
+    return bool(href_hostname) and href_hostname != base_hostname
+
+def model_dir() -> str:
+    """Directory holding the trained artifacts (resolved lazily so Django settings are ready)."""
+    return os.path.join(settings.BASE_DIR, 'predictor', 'ml_model')
+
+ONNX_MODEL_FILE = 'phishing_rf_model.onnx'
+
+ModelArtifacts = namedtuple('ModelArtifacts', [
+    'model', 'scaler', 'ordered_features', 'feature_idx', 'onnx_session', 'onnx_input_name',
+    'scale', 'offset', 'clip_range',
+])
+
+GOOD_DOMAINS_FILE = 'good_domains.txt'
+
+@functools.lru_cache(maxsize=1)
+def _load_good_domains() -> frozenset:
+    """
+    Known-good registered domains (eTLD+1) that skip the whole pipeline, one per line
+    in predictor/ml_model/good_domains.txt. Empty if the file is absent. SAFE_REG_DOMAINS
+    is deliberately not included: several of those host user content, so they only
+    raise the model threshold.
+    """
+    domains = set()
+    path = os.path.join(model_dir(), GOOD_DOMAINS_FILE)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                domain = line.strip().lower()
+                # Skip blank lines and comments, including indented ones
+                if domain and not domain.startswith('#'):
+                    domains.add(domain)
+    return frozenset(domains)
+
+_ARTIFACTS = None
+_ARTIFACTS_LOCK = threading.Lock()
+
+def _load_artifacts():
+    """
+    Return the process-wide ModelArtifacts, loading them on first use. The lock
+    ensures concurrent first requests load them exactly once.
+    """
+    global _ARTIFACTS
+    if _ARTIFACTS is None:
+        with _ARTIFACTS_LOCK:
+            if _ARTIFACTS is None:
+                _ARTIFACTS = _read_artifacts()
+    return _ARTIFACTS
+
+def _read_artifacts():
+    """
+    Load the pre-trained model, scaler, ordered feature list and its
+    {feature_name: column_index} map from disk, plus an ONNX Runtime
+    session if onnxruntime is installed and an exported model is present.
+    The scaler's affine transform is materialized as float32 scale/offset rows.
+    Raises FileNotFoundError if a required file is missing.
+    """
+    model_dir_path = model_dir()
+    model = joblib.load(os.path.join(model_dir_path, 'phishing_rf_model.pkl'))
+    scaler = joblib.load(os.path.join(model_dir_path, 'scaler_minmax.pkl'))
+    with open(os.path.join(model_dir_path, 'features.txt'), 'r') as f:
+        ordered_features = tuple(line.strip() for line in f if line.strip())
+    feature_idx = {name: i for i, name in enumerate(ordered_features)}
+
+    onnx_session = onnx_input_name = None
+    onnx_path = os.path.join(model_dir_path, ONNX_MODEL_FILE)
+    if onnxruntime and os.path.exists(onnx_path):
+        onnx_session = onnxruntime.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+        onnx_input_name = onnx_session.get_inputs()[0].name
+
+    # MinMaxScaler.transform is X * scale_ + min_ (scale_ already folds in feature_range)
+    scale = np.asarray(scaler.scale_, dtype=np.float32).reshape(1, -1)
+    offset = np.asarray(scaler.min_, dtype=np.float32).reshape(1, -1)
+    clip_range = tuple(scaler.feature_range) if getattr(scaler, 'clip', False) else None
+
+    return ModelArtifacts(model, scaler, ordered_features, feature_idx, onnx_session, onnx_input_name,
+                          scale, offset, clip_range)
 
 # --- Core Logic Functions ---
 
-def calculate_heuristic_score(string_features, hostname):
+# Heuristic score at which predict_url_class rejects without consulting the ML model
+HEURISTIC_REJECT_SCORE = 2
+
+def calculate_heuristic_score(string_features, hostname, check_https=True):
     """
     Calculates a phishing score based on URL string features alone.
     This acts as a fast-path rejection for obviously suspicious URLs.
+    Pass check_https=False to skip rule 1 when the final scheme is not known yet.
     """
     score = 0
     info_log = []  # A log to explain why the score was increased.
 
     # Rule 1: No HTTPS is a red flag.
-    if string_features.get('NoHttps', 0) == 1:
+    if check_https and string_features.NoHttps == 1:
         score += 1
         info_log.append("URL does not use HTTPS.")
 
     # Rule 2: Excessive subdomains (e.g., login.account.secure.com) are suspicious.
-    if string_features.get('SubdomainLevel', 0) > 2:
+    if string_features.SubdomainLevel > 2:
         score += 1
         info_log.append("URL has a high number of subdomains.")
 
     # Rule 3: Dashes in the hostname can be used to mimic legitimate domains.
-    if string_features.get('NumDashInHostname', 0) > 0:
+    if string_features.NumDashInHostname > 0:
         score += 1
         info_log.append("URL contains dashes in the hostname.")
 
     # Rule 4: Presence of sensitive words is a strong indicator.
-    if string_features.get('NumSensitiveWords', 0) > 0:
+    if string_features.NumSensitiveWords > 0:
         score += 1
         info_log.append("URL contains sensitive keywords (e.g., 'login', 'secure').")
 
     # Rule 5: Unusually long hostnames can hide the true domain.
-    if string_features.get('HostnameLength', 0) > 25:
+    if string_features.HostnameLength > 25:
         score += 1
         info_log.append("URL has an unusually long hostname.")
 
-    # Rule 6: Typosquatting Check (only if library is installed).
-    if levenshtein_distance:
-        domain = extract_domain(hostname)
-        if domain:
-            for target in TARGET_DOMAINS:
-                dist = levenshtein_distance(domain, target)
-                if 0 < dist <= 2:
-                    info_log.append(f"Potential typosquatting detected. Domain '{domain}' is very close to '{target}'.")
-                    score += 2
-                    break
+    # Rules 1-5 already reaching the rejection threshold make the typosquatting scan moot.
+    if score >= HEURISTIC_REJECT_SCORE:
+        return score, info_log
+
+    # Rule 6: Typosquatting Check (only if an edit-distance library is installed).
+    domain = extract_domain(hostname)
+    target = find_typosquat_target(domain) if domain else None
+    if target:
+        info_log.append(f"Potential typosquatting detected. Domain '{domain}' is very close to '{target}'.")
+        score += 2
 
     return score, info_log
 
-def extract_features_from_url(url):
+def extract_string_features(url, parsed=None):
     """
-    Extract features using the final URL after redirects (for consistency).
-    Falls back to original URL parsing if the fetch fails.
+    Compute the URL-string features. These need no network access, so they are
+    cheap enough to feed the heuristic pre-filter before any page is fetched.
+    Pass parsed (urlparse(url)) if the caller already has it.
+    Returns (StringFeatures, hostname).
     """
-    string_features, content_features = {}, {}
-
-    original_url = url
-    final_url = url
-    soup = None
-
-    # Default parsed parts from original; will be replaced if fetch succeeds
-    parsed = urlparse(url)
+    if parsed is None:
+        parsed = urlparse(url)
     hostname = parsed.hostname or ''
     path = parsed.path or ''
     query = parsed.query or ''
-    scheme = (parsed.scheme or '').lower()
+    scheme = parsed.scheme  # urlparse already lowercases the scheme
+
+    url_lower = url.lower()
+    # Byte histogram of the URL in one vectorized pass; every counted symbol is ASCII.
+    char_counts = np.bincount(np.frombuffer(url.encode('utf-8', 'ignore'), dtype=np.uint8), minlength=256)
+
+    string_features = StringFeatures(
+        NumDots=int(char_counts[ord('.')]),
+        SubdomainLevel=(hostname or '').count('.'),
+        PathLevel=(path or '').count('/'),
+        UrlLength=len(url),
+        NumDash=int(char_counts[ord('-')]),
+        NumDashInHostname=(hostname or '').count('-'),
+        AtSymbol=int(char_counts[ord('@')]),
+        TildeSymbol=int(char_counts[ord('~')]),
+        NumUnderscore=int(char_counts[ord('_')]),
+        NumPercent=int(char_counts[ord('%')]),
+        NumQueryComponents=len((query or '').split('&')) if query else 0,
+        NumAmpersand=int(char_counts[ord('&')]),
+        NumHash=int(char_counts[ord('#')]),
+        # Only ASCII URLs can skip str.isdigit, which also counts non-ASCII digits such as '١'.
+        NumNumericChars=(int(char_counts[ord('0'):ord('9') + 1].sum()) if url.isascii()
+                         else sum(1 for c in url if c.isdigit())),
+        NoHttps=1 if scheme != 'https' else 0,
+        RandomString=1 if _RE_RANDOM_STRING.search(url_lower) else 0,
+        IpAddress=1 if is_ip_address(hostname) else 0,
+        DomainInSubdomains=0,  # Placeholder (compat)
+        DomainInPaths=0,  # Placeholder (compat)
+        HostnameLength=len(hostname or ''),
+        PathLength=len(path or ''),
+        QueryLength=len(query or ''),
+        DoubleSlashInPath=(path or '').count('//'),
+        NumSensitiveWords=count_sensitive_words(url_lower),
+    )
 
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-        }
-        # Verify TLS; follow redirects
-        response = requests.get(url, timeout=8, headers=headers, verify=True, allow_redirects=True)
-        final_url = response.url or url
-
-        # Re-parse using the final URL
-        parsed_final = urlparse(final_url)
-        hostname = parsed_final.hostname or hostname
-        path = parsed_final.path or ''
-        query = parsed_final.query or ''
-        scheme = (parsed_final.scheme or '').lower()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
+    return string_features, hostname
 
+def _fetch_page(url):
+    """
+    Fetch url, following redirects. Returns (final_url, body_bytes), or (url, None)
+    if the fetch fails. Non-HTML responses come back with an empty body without
+    downloading it. Pure I/O, so it is safe to fan out across threads.
+    """
+    try:
+        # Verify TLS; follow redirects; stream so only the first MAX_BODY_BYTES are read
+        with _SESSION.get(url, timeout=FETCH_TIMEOUT, verify=True, allow_redirects=True, stream=True) as response:
+            final_url = response.url or url
+            content_type = response.headers.get('Content-Type', '').lower()
+            if content_type and 'html' not in content_type and 'xml' not in content_type:
+                # Images, PDFs, downloads...: headers are enough, treat as an empty page
+                return final_url, b''
+            return final_url, response.raw.read(MAX_BODY_BYTES, decode_content=True)
     except Exception:
-        # If fetching fails, we proceed with string features from the original URL only.
-        pass
-
-    # --- Part 1: URL String Features (computed on final_url for consistency) ---
-    base_for_counts = final_url or original_url
-    string_features['NumDots'] = base_for_counts.count('.')
-    string_features['SubdomainLevel'] = (hostname or '').count('.')
-    string_features['PathLevel'] = (path or '').count('/')
-    string_features['UrlLength'] = len(base_for_counts)
-    string_features['NumDash'] = base_for_counts.count('-')
-    string_features['NumDashInHostname'] = (hostname or '').count('-')
-    string_features['AtSymbol'] = base_for_counts.count('@')
-    string_features['TildeSymbol'] = base_for_counts.count('~')
-    string_features['NumUnderscore'] = base_for_counts.count('_')
-    string_features['NumPercent'] = base_for_counts.count('%')
-    string_features['NumQueryComponents'] = len((query or '').split('&')) if query else 0
-    string_features['NumAmpersand'] = base_for_counts.count('&')
-    string_features['NumHash'] = base_for_counts.count('#')
-    string_features['NumNumericChars'] = sum(c.isdigit() for c in base_for_counts)
-
-    string_features['NoHttps'] = 1 if scheme != 'https' else 0
-
-    string_features['RandomString'] = 1 if re.search(r'[0-9a-f]{20,}', base_for_counts.lower()) else 0
-    string_features['IpAddress'] = 1 if re.match(r'^\d{1,3}(?:\.\d{1,3}){3}$', hostname or '') else 0
-    string_features['DomainInSubdomains'] = 0  # Placeholder (compat)
-    string_features['DomainInPaths'] = 0       # Placeholder (compat)
-    string_features['HostnameLength'] = len(hostname or '')
-    string_features['PathLength'] = len(path or '')
-    string_features['QueryLength'] = len(query or '')
-    string_features['DoubleSlashInPath'] = (path or '').count('//')
-    string_features['NumSensitiveWords'] = sum(
-        word in base_for_counts.lower()
-        for word in ['secure', 'account', 'webscr', 'login', 'ebayisapi', 'banking', 'confirm']
-    )
+        # If fetching fails, the model falls back to string features only.
+        return url, None
+
+# Content features of a page plus the final (post-redirect) URL they were judged against.
+# fetched is False when the fetch failed and the features are all defaults.
+PageFeatures = namedtuple('PageFeatures', ['content_features', 'final_url', 'final_parsed', 'fetched'])
+
+def _get_cached_content_features(url):
+    """Return the cached PageFeatures for url, or None."""
+    if _CONTENT_CACHE is None:
+        return None
+    with _CONTENT_CACHE_LOCK:
+        return _CONTENT_CACHE.get(url)
 
-    # --- Part 2: Content-Based Features ---
-    content_keys = [
-        'PctExtHyperlinks', 'PctExtResourceUrls', 'ExtFavicon', 'InsecureForms',
-        'RelativeFormAction', 'ExtFormAction', 'AbnormalFormAction',
-        'PctNullSelfRedirectHyperlinks', 'FrequentDomainNameMismatch',
-        'FakeLinkInStatusBar', 'RightClickDisabled', 'PopUpWindow',
-        'SubmitInfoToEmail', 'IframeOrFrame', 'MissingTitle',
-        'ImagesOnlyInForm', 'EmbeddedBrandName'
-    ]
-    for key in content_keys:
-        content_features[key] = 0
-
-    if soup is not None:
+def extract_content_features(url, page=None, parsed=None):
+    """
+    Compute the page's content-based features, reusing a cached result for the
+    same URL within the TTL. page is an already-fetched (final_url, body) from
+    _fetch_page; if omitted, the page is fetched here. Pass parsed (urlparse(url))
+    if the caller already has it; it is reused when the page did not redirect.
+    Features stay at their defaults if the fetch failed.
+    Returns PageFeatures; callers must not mutate its content_features dict.
+    """
+    cached = _get_cached_content_features(url)
+    if cached is not None:
+        return cached
+
+    final_url, body = page if page is not None else _fetch_page(url)
+    if final_url != url or parsed is None:
+        parsed = urlparse(final_url)
+    result = PageFeatures(compute_content_features(body, parsed), final_url, parsed, body is not None)
+    # Failed fetches are not cached: the failure may be transient.
+    if body is not None and _CONTENT_CACHE is not None:
+        with _CONTENT_CACHE_LOCK:
+            _CONTENT_CACHE[url] = result
+    return result
+
+def compute_content_features(body, parsed_final):
+    """
+    Compute the content-based features from a fetched page body, judged against
+    the final URL (parsed_final is its urlparse result). Only features that were
+    actually computed are returned; the rest default to 0 in the model row (all
+    of them if body is None or unparsable).
+    """
+    content_features = {}
+
+    # Links and forms are judged against the final (post-redirect) host and scheme
+    hostname = parsed_final.hostname or ''
+    scheme = parsed_final.scheme
+
+    if body is not None:
         try:
+            soup = BeautifulSoup(body, HTML_PARSER)
+
+            # Walk the tree once, bucketing the elements the features below need
+            hrefs, resources, forms = [], [], []
+            favicon_href = None
+            title = None
+            has_frame = False
+            for el in soup.find_all(True):
+                name = el.name
+                if name == 'a':
+                    href = el.get('href')
+                    if href is not None:
+                        hrefs.append(href)
+                elif name in ('img', 'script', 'iframe'):
+                    src = el.get('src')
+                    if src:
+                        resources.append(src)
+                    if name == 'iframe':
+                        has_frame = True
+                elif name == 'link':
+                    href = el.get('href')
+                    if href:
+                        resources.append(href)
+                    rel = el.get('rel')
+                    if favicon_href is None and href is not None and rel:
+                        rel_vals = rel if isinstance(rel, list) else [rel]
+                        if 'icon' in ' '.join(rel_vals).lower():
+                            favicon_href = href
+                elif name == 'form':
+                    forms.append(el)
+                elif name == 'frame':
+                    has_frame = True
+                elif name == 'title' and title is None:
+                    title = el
+
             # Hyperlinks
-            links = soup.find_all('a', href=True)
-            if links:
+            if hrefs:
                 ext_links = 0
                 null_links = 0
-                for link in links:
-                    href = link.get('href', '')
-                    if (not href) or href.startswith('#') or 'javascript:void(0)' in href.lower():
+                for href in hrefs:
+                    if (not href) or href.startswith('#') or (':' in href and 'javascript:void(0)' in href.lower()):
                         null_links += 1
                     elif is_external(href, hostname):
                         ext_links += 1
-                content_features['PctExtHyperlinks'] = ext_links / len(links)
-                content_features['PctNullSelfRedirectHyperlinks'] = null_links / len(links)
+                content_features['PctExtHyperlinks'] = ext_links / len(hrefs)
+                content_features['PctNullSelfRedirectHyperlinks'] = null_links / len(hrefs)
 
             # External resource URLs
-            resources = []
-            for tag, attr in (('img', 'src'), ('script', 'src'), ('iframe', 'src'), ('link', 'href')):
-                for el in soup.find_all(tag):
-                    val = el.get(attr)
-                    if val:
-                        resources.append(val)
             if resources:
                 ext_res = sum(1 for r in resources if is_external(r, hostname))
                 content_features['PctExtResourceUrls'] = ext_res / len(resources)
 
             # Favicon
-            for l in soup.find_all('link', rel=True, href=True):
-                rel_vals = l.get('rel') if isinstance(l.get('rel'), list) else [l.get('rel')]
-                rel_vals = ' '.join(rel_vals).lower()
-                if 'icon' in rel_vals:
-                    content_features['ExtFavicon'] = 1 if is_external(l['href'], hostname) else 0
-                    break
+            if favicon_href is not None:
+                content_features['ExtFavicon'] = 1 if is_external(favicon_href, hostname) else 0
 
             # Title
-            content_features['MissingTitle'] = 0 if soup.title and soup.title.string else 1
+            content_features['MissingTitle'] = 0 if title and title.string else 1
 
             # Iframe/frame
-            if soup.find('iframe') or soup.find('frame'):
+            if has_frame:
                 content_features['IframeOrFrame'] = 1
 
             # Rudimentary JS checks
-            page_text = soup.get_text(separator=' ', strip=True).lower()[:200000]
-            page_html = str(soup)[:300000].lower()
+            page_text = soup.get_text(separator=' ', strip=True)[:200000].lower()
+            # Search the fetched source (already bounded by MAX_BODY_BYTES) instead of
+            # re-serializing the parsed tree with str(soup). Serialization decodes character
+            # references, so fall back to it only when one could be hiding a marker.
+            page_html = body.decode(soup.original_encoding or 'utf-8', errors='replace').lower()
+            if _has_encoded_marker_chars(page_html):
+                page_html = str(soup).lower()
 
             if 'window.open(' in page_html:
                 content_features['PopUpWindow'] = 1
@@ -338,7 +671,6 @@ def extract_features_from_url(url):
                 content_features['SubmitInfoToEmail'] = 1
 
             # Forms
-            forms = soup.find_all('form')
             if forms:
                 insecure = 0
                 relative = 0
@@ -354,7 +686,7 @@ def extract_features_from_url(url):
                         if not parsed_action.scheme and not parsed_action.netloc:
                             relative += 1
                         else:
-                            if parsed_action.scheme.lower() == 'http' and scheme == 'https':
+                            if parsed_action.scheme == 'http' and scheme == 'https':
                                 insecure += 1
                             if is_external(action, hostname):
                                 external += 1
@@ -366,79 +698,220 @@ def extract_features_from_url(url):
 
             # Simple brand embedding
             main_domain = extract_domain(hostname)
-            if main_domain:
-                for brand in TARGET_DOMAINS:
-                    if brand in page_text and brand not in hostname:
-                        content_features['EmbeddedBrandName'] = 1
-                        break
+            if main_domain and find_embedded_brand(page_text, hostname):
+                content_features['EmbeddedBrandName'] = 1
 
         except Exception:
             # Best-effort: leave content features at defaults if parsing fails
             pass
 
-    # --- Part 3: Combine and add Real-Time (RT) features ---
-    all_features = {**string_features, **content_features}
-    all_features['SubdomainLevelRT'] = all_features.get('SubdomainLevel', 0)
-    all_features['UrlLengthRT'] = all_features.get('UrlLength', 0)
-    all_features['PctExtResourceUrlsRT'] = all_features.get('PctExtResourceUrls', 0)
-    all_features['AbnormalExtFormActionR'] = all_features.get('AbnormalFormAction', 0)
-    all_features['ExtMetaScriptLinkRT'] = all_features.get('PctExtResourceUrls', 0)
-    all_features['PctExtNullSelfRedirectHyperlinksRT'] = all_features.get('PctNullSelfRedirectHyperlinks', 0)
+    return content_features
 
-    # Return final hostname (used by heuristics) and final_url for logging
-    return pd.DataFrame([all_features]), string_features, hostname, final_url
+def build_feature_row(string_features, content_features, feature_idx):
+    """
+    Write string and content features straight into a (1, n_features) float32 row
+    in training order per feature_idx, then fill the Real-Time (RT) aliases.
+    Anything not computed stays 0 by construction.
+    """
+    row = np.zeros((1, len(feature_idx)), dtype=np.float32)
+    for name, value in zip(StringFeatures._fields, string_features):
+        idx = feature_idx.get(name)
+        if idx is not None:
+            row[0, idx] = value
+    for name, value in content_features.items():
+        idx = feature_idx.get(name)
+        if idx is not None:
+            row[0, idx] = value
+
+    for alias, source in _RT_FEATURE_ALIASES:
+        if alias in feature_idx and source in feature_idx:
+            row[0, feature_idx[alias]] = row[0, feature_idx[source]]
+
+    return row
 
 # --- Main Entry Point for Prediction ---
 
+# State carried from the cheap first stage to the ML stage for URLs that need the model
+_PendingPrediction = namedtuple('_PendingPrediction', [
+    'url', 'parsed', 'string_features', 'hostname', 'artifacts',
+])
+
+def _get_cached_prediction(url):
+    """Return the cached prediction dict for url, or None."""
+    if _PREDICTION_CACHE is None:
+        return None
+    with _PREDICTION_CACHE_LOCK:
+        return _PREDICTION_CACHE.get(url.strip())
+
+def _cache_prediction(url, result):
+    """Remember a successful prediction for url; error results are never cached."""
+    if _PREDICTION_CACHE is not None and "error" not in result:
+        with _PREDICTION_CACHE_LOCK:
+            _PREDICTION_CACHE[url.strip()] = result
+
 def predict_url_class(url):
     """
     The main prediction function. It orchestrates the entire two-stage process.
     Returns a dictionary containing the final prediction and supporting information.
+    Repeat checks of the same URL within the TTL are served from cache; callers
+    must not mutate the returned dict.
+    """
+    cached = _get_cached_prediction(url)
+    if cached is not None:
+        return cached
+
+    result, pending = _run_first_stage(url)
+    fetched = True
+    if result is None:
+        result, fetched = _run_model_stage(pending)
+    # A verdict reached after a failed fetch is not cached: the failure may be transient.
+    if fetched:
+        _cache_prediction(url, result)
+    return result
+
+def predict_url_classes(urls):
+    """
+    Batch entry point. Runs the cheap first stage for every URL, fetches the pages
+    still needed concurrently (the dominant, I/O-bound cost), then runs the
+    CPU-bound parsing and model stage sequentially.
+    Results are returned in the same order as the input. A URL that cannot be
+    analyzed gets an {"error": ...} entry in its slot instead of failing the batch.
+    """
+    staged = []
+    for url in urls:
+        # Cache hits are not written back, so repeated batches do not extend their TTL.
+        result, pending = _get_cached_prediction(url), None
+        if result is None:
+            try:
+                result, pending = _run_first_stage(url)
+            except Exception as exc:
+                # e.g. urlparse raises ValueError on an invalid IPv6 literal such as 'https://[::1'
+                result = _batch_error(url, exc)
+            if result is not None:
+                _cache_prediction(url, result)
+        staged.append((result, pending))
+
+    # Each distinct page is fetched once, even if the batch repeats a URL.
+    to_fetch = list(dict.fromkeys(
+        pending.url for result, pending in staged
+        if result is None and _get_cached_content_features(pending.url) is None
+    ))
+    pages = dict(zip(to_fetch, _BATCH_POOL.map(_fetch_page, to_fetch)))
+
+    results = []
+    for url, (result, pending) in zip(urls, staged):
+        if result is None:
+            try:
+                result, fetched = _run_model_stage(pending, pages.get(pending.url))
+            except Exception as exc:
+                result, fetched = _batch_error(url, exc), False
+            # As in predict_url_class, verdicts reached after a failed fetch are not cached.
+            if fetched:
+                _cache_prediction(url, result)
+        results.append(result)
+    return results
+
+def _batch_error(url, exc):
+    """Error entry for one URL of a batch that could not be analyzed."""
+    return {"error": f"Could not analyze URL: {exc}", "url": url}
+
+def _run_first_stage(url):
+    """
+    Normalize the URL and run everything that needs no network access: the
+    allow-list fast path and the heuristic pre-filter.
+    Returns (result, None) when a verdict is already reached, else (None, _PendingPrediction).
     """
     # 1. Normalize schemeless URLs to be user-friendly.
-    if not re.search(r'^https?://', url, re.IGNORECASE):
+    if not url[:8].lower().startswith(('http://', 'https://')):
         url = 'http://' + url
 
-    # 2. Load the pre-trained model, scaler, and feature list.
-    model_dir = os.path.join(settings.BASE_DIR, 'predictor', 'ml_model')
+    # 2. Get the pre-trained model, scaler, and feature list (loaded once per process).
     try:
-        model = joblib.load(os.path.join(model_dir, 'phishing_rf_model.pkl'))
-        scaler = joblib.load(os.path.join(model_dir, 'scaler_minmax.pkl'))
-        with open(os.path.join(model_dir, 'features.txt'), 'r') as f:
-            ordered_features = [line.strip() for line in f if line.strip()]
+        artifacts = _load_artifacts()
     except FileNotFoundError:
-        return {"error": "Model/Scaler/Features file not found. Please check the 'predictor/ml_model/' directory."}
+        return {"error": "Model/Scaler/Features file not found. Please check the 'predictor/ml_model/' directory."}, None
+
+    # 3. Parse once and extract the cheap URL-string features (no network access yet).
+    parsed = urlparse(url)
+    string_features, hostname = extract_string_features(url, parsed)
+
+    # Fast path: HTTPS URLs on an allow-listed registered domain need no fetch or model.
+    reg_dom = get_registered_domain(hostname)
+    if string_features.NoHttps == 0 and reg_dom in _load_good_domains():
+        return {
+            "prediction": "Legitimate ✅",
+            "info": [f"Domain '{reg_dom}' is on the known-good allow-list."],
+            "url": url
+        }, None
+
+    # 4. STAGE 1: Heuristic Pre-Filter, before any fetch. Rule 1 (no HTTPS) is left out here:
+    # the scheme is often synthesized above, and the page may still redirect to HTTPS.
+    heuristic_score, info_log = calculate_heuristic_score(string_features, hostname, check_https=False)
+
+    # A score of HEURISTIC_REJECT_SCORE (2) or more is a strong enough signal to reject immediately,
+    # without paying for the page fetch and HTML parse.
+    if heuristic_score >= HEURISTIC_REJECT_SCORE:
+        info_log.append("URL flagged by high-risk heuristic pre-filter.")
+        return {
+            "prediction": "Phishing 🚨",
+            "info": info_log,
+            "url": url
+        }, None
+
+    return None, _PendingPrediction(url, parsed, string_features, hostname, artifacts)
+
+def _run_model_stage(pending, page=None):
+    """
+    STAGE 2: fetch the page, re-score the heuristic on the final URL, then run
+    the full ML model prediction for a URL that passed the first stage.
+    page is an optional pre-fetched (final_url, body).
+    Returns (result, fetched), where fetched is False if the page fetch failed.
+    """
+    url, parsed, string_features, hostname, artifacts = pending
+
+    content_features, final_url, final_parsed, fetched = extract_content_features(url, page, parsed)
 
-    # 3. Extract all features from the URL (using final URL after redirects).
-    features_df, string_features, hostname, final_url = extract_features_from_url(url)
+    # If we followed redirects, recompute string features on the final URL
+    # so the model sees the same inputs it was trained on.
+    redirected = bool(final_url) and final_url != url
+    if redirected:
+        string_features, hostname = extract_string_features(final_url, final_parsed)
 
-    # 4. STAGE 1: Heuristic Pre-Filter
+    # Re-run the full heuristic, rule 1 included, now that the final scheme is known.
     heuristic_score, info_log = calculate_heuristic_score(string_features, hostname)
 
     # If we followed redirects, log it for transparency (non-breaking)
-    if final_url and final_url != url:
+    if redirected:
         info_log.append(f"Followed redirects to: {final_url}")
 
-    # A score of 2 or more is a strong enough signal to reject immediately.
-    if heuristic_score >= 2:
+    if heuristic_score >= HEURISTIC_REJECT_SCORE:
         info_log.append("URL flagged by high-risk heuristic pre-filter.")
         return {
             "prediction": "Phishing 🚨",
             "info": info_log,
             "url": url
-        }
+        }, fetched
 
     # 5. STAGE 2: Full Machine Learning Model Prediction
     info_log.append("Heuristic check passed. Using full ML model.")
 
-    # Ensure DataFrame columns are in the same order as during training.
-    features_df = features_df.reindex(columns=ordered_features, fill_value=0)
+    feature_row = build_feature_row(string_features, content_features, artifacts.feature_idx)
 
-    # Scale the features
-    scaled_features = scaler.transform(features_df)
+    # Scale the features inline and in place (same result as scaler.transform,
+    # without sklearn's validation overhead or intermediate arrays)
+    scaled_features = feature_row
+    np.multiply(scaled_features, artifacts.scale, out=scaled_features)
+    scaled_features += artifacts.offset
+    if artifacts.clip_range is not None:
+        np.clip(scaled_features, *artifacts.clip_range, out=scaled_features)
 
     # Probability + domain-aware threshold gating
-    if hasattr(model, "predict_proba"):
+    model, onnx_session = artifacts.model, artifacts.onnx_session
+    if onnx_session is not None:
+        # Output 1 of the exported graph is the (n, 2) class-probability tensor
+        onnx_inputs = {artifacts.onnx_input_name: scaled_features}
+        proba = float(onnx_session.run(None, onnx_inputs)[1][0, 1])
+    elif hasattr(model, "predict_proba"):
         proba = float(model.predict_proba(scaled_features)[0, 1])
     else:
         # Fall back to decision via predict() if proba not available
@@ -446,7 +919,7 @@ def predict_url_class(url):
                 if hasattr(model, "decision_function") else float(model.predict(scaled_features)[0])
 
     reg_dom = get_registered_domain(hostname)
-    final_scheme = (urlparse(final_url).scheme or '').lower()
+    final_scheme = final_parsed.scheme
     is_safe_domain = reg_dom in SAFE_REG_DOMAINS
     threshold = 0.9 if (is_safe_domain and final_scheme == 'https') else 0.5
 
@@ -459,4 +932,4 @@ def predict_url_class(url):
         "prediction": result,
         "info": info_log,
         "url": url
-    }
\ No newline at end of file
+    }, fetched
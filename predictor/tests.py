@@ -1,3 +1,246 @@
+from unittest import mock, skipIf
+from urllib.parse import urlparse
+
+import numpy as np
 from django.test import TestCase
 
-# Create your tests here.
+from predictor import predictor_logic
+from predictor.predictor_logic import ModelArtifacts, predict_url_class, predict_url_classes
+
+FEATURES = ('NoHttps', 'NumDots', 'UrlLength', 'PctExtHyperlinks', 'MissingTitle')
+
+PAGE = b'<html><head><title>Welcome</title></head><body><a href="/about">About</a></body></html>'
+
+
+class FakeModel:
+    """Stands in for the RandomForest: returns a fixed phishing probability."""
+
+    def __init__(self, proba):
+        self.proba = proba
+        self.rows = []
+
+    def predict_proba(self, X):
+        self.rows.append(X.copy())
+        return np.array([[1.0 - self.proba, self.proba]])
+
+
+def fake_artifacts(model):
+    n = len(FEATURES)
+    return ModelArtifacts(
+        model=model,
+        scaler=None,
+        ordered_features=FEATURES,
+        feature_idx={name: i for i, name in enumerate(FEATURES)},
+        onnx_session=None,
+        onnx_input_name=None,
+        scale=np.ones((1, n), dtype=np.float32),
+        offset=np.zeros((1, n), dtype=np.float32),
+        clip_range=None,
+    )
+
+
+def fake_response(final_url, body=PAGE, content_type='text/html; charset=utf-8'):
+    response = mock.MagicMock()
+    response.url = final_url
+    response.headers = {'Content-Type': content_type}
+    response.raw.read.return_value = body
+    response.__enter__.return_value = response
+    return response
+
+
+class PredictorTestCase(TestCase):
+    def setUp(self):
+        # Predictions and page features are cached per process; start every test cold.
+        for cache in (predictor_logic._PREDICTION_CACHE, predictor_logic._CONTENT_CACHE):
+            if cache is not None:
+                cache.clear()
+        self.model = FakeModel(proba=0.1)
+        patcher = mock.patch.object(predictor_logic, '_load_artifacts', return_value=fake_artifacts(self.model))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def patch_fetch(self, **kwargs):
+        patcher = mock.patch.object(predictor_logic._SESSION, 'get', **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+
+class HeuristicPreFilterTests(PredictorTestCase):
+    def test_schemeless_url_redirected_to_https_is_not_rejected_before_fetch(self):
+        for url in ('www.chase.com/account', 'my-bank.com', 'http://secure.example.com'):
+            with self.subTest(url=url):
+                host_and_path = url.split('://')[-1]
+                get = self.patch_fetch(return_value=fake_response('https://' + host_and_path))
+
+                result = predict_url_class(url)
+
+                get.assert_called_once()
+                self.assertEqual(result['prediction'], 'Legitimate ✅')
+                self.assertNotIn("URL does not use HTTPS.", result['info'])
+                self.assertIn("Heuristic check passed. Using full ML model.", result['info'])
+
+    def test_http_url_is_rescored_on_the_final_url(self):
+        # No redirect to HTTPS: rule 1 counts once the final scheme is known.
+        self.patch_fetch(return_value=fake_response('http://www.example.com/account'))
+
+        result = predict_url_class('www.example.com/account')
+
+        self.assertEqual(result['prediction'], 'Phishing 🚨')
+        self.assertIn("URL does not use HTTPS.", result['info'])
+        self.assertEqual(self.model.rows, [])
+
+    def test_rejects_without_fetch_when_other_rules_reach_the_score(self):
+        get = self.patch_fetch(return_value=fake_response('https://secure-login.example.com/'))
+
+        result = predict_url_class('https://secure-login.example.com/')
+
+        get.assert_not_called()
+        self.assertEqual(result['prediction'], 'Phishing 🚨')
+        self.assertIn("URL flagged by high-risk heuristic pre-filter.", result['info'])
+
+
+class ModelPathTests(PredictorTestCase):
+    def test_fetched_page_features_reach_the_model(self):
+        page = (b'<html><head><title>Shop</title></head><body>'
+                b'<a href="/cart">Cart</a><a href="https://other.example.org/">Partner</a></body></html>')
+        get = self.patch_fetch(return_value=fake_response('https://shop.example.com/', body=page))
+
+        result = predict_url_class('https://shop.example.com/')
+
+        get.assert_called_once()
+        self.assertEqual(result['prediction'], 'Legitimate ✅')
+        self.assertTrue(any(line.startswith('Model score=0.100') for line in result['info']))
+        [row] = self.model.rows
+        self.assertEqual(row.shape, (1, len(FEATURES)))
+        self.assertEqual(row.dtype, np.float32)
+        self.assertAlmostEqual(row[0, FEATURES.index('PctExtHyperlinks')], 0.5)
+        self.assertEqual(row[0, FEATURES.index('MissingTitle')], 0)
+
+    def test_failed_fetch_falls_back_to_string_features(self):
+        self.model.proba = 0.8
+        self.patch_fetch(side_effect=predictor_logic.requests.ConnectionError)
+
+        result = predict_url_class('https://shop.example.com/')
+
+        self.assertEqual(result['prediction'], 'Phishing 🚨')
+        [row] = self.model.rows
+        self.assertEqual(row[0, FEATURES.index('PctExtHyperlinks')], 0)
+        self.assertEqual(row[0, FEATURES.index('UrlLength')], len('https://shop.example.com/'))
+
+
+class AllowListTests(PredictorTestCase):
+    def setUp(self):
+        super().setUp()
+        predictor_logic._load_good_domains.cache_clear()
+        self.addCleanup(predictor_logic._load_good_domains.cache_clear)
+
+    def test_safe_domains_are_not_allow_listed(self):
+        # SAFE_REG_DOMAINS includes user-content hosts; they only raise the threshold.
+        self.model.proba = 0.95
+        get = self.patch_fetch(return_value=fake_response('https://sites.google.com/view/secure-paypal-login-verify'))
+
+        with mock.patch.object(predictor_logic.os.path, 'exists', return_value=False):
+            result = predict_url_class('https://sites.google.com/view/secure-paypal-login-verify')
+
+        get.assert_called_once()
+        self.assertEqual(len(self.model.rows), 1)
+        self.assertEqual(result['prediction'], 'Phishing 🚨')
+
+    def test_good_domains_file_skips_fetch_and_model(self):
+        get = self.patch_fetch(return_value=fake_response('https://www.example.com/'))
+
+        read_data = '# known good\nexample.com\n\n  # staging hosts\n'
+        with mock.patch.object(predictor_logic.os.path, 'exists', return_value=True), \
+                mock.patch('builtins.open', mock.mock_open(read_data=read_data)):
+            result = predict_url_class('https://www.example.com/')
+            good_domains = predictor_logic._load_good_domains()
+
+        get.assert_not_called()
+        self.assertEqual(self.model.rows, [])
+        self.assertEqual(result['prediction'], 'Legitimate ✅')
+        self.assertEqual(good_domains, frozenset({'example.com'}))
+
+
+@skipIf(predictor_logic.TTLCache is None, 'cachetools is not installed')
+class PredictionCacheTests(PredictorTestCase):
+    def test_prediction_after_failed_fetch_is_not_cached(self):
+        get = self.patch_fetch(side_effect=predictor_logic.requests.ConnectionError)
+
+        first = predict_url_class('https://shop.example.com/')
+
+        self.assertIsNone(predictor_logic._get_cached_prediction('https://shop.example.com/'))
+        get.side_effect = None
+        get.return_value = fake_response('https://shop.example.com/')
+        second = predict_url_class('https://shop.example.com/')
+
+        self.assertEqual(get.call_count, 2)
+        self.assertIsNot(first, second)
+        self.assertIs(predictor_logic._get_cached_prediction('https://shop.example.com/'), second)
+
+    def test_batch_cache_hits_keep_their_original_expiry(self):
+        clock = [0]
+        cache = predictor_logic.TTLCache(maxsize=16, ttl=300, timer=lambda: clock[0])
+        patcher = mock.patch.object(predictor_logic, '_PREDICTION_CACHE', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        get = self.patch_fetch(side_effect=lambda url, **kw: fake_response(url))
+
+        predict_url_classes(['https://shop.example.com/'])
+        clock[0] = 200
+        predict_url_classes(['https://shop.example.com/'])
+        self.assertEqual(get.call_count, 1)
+
+        # Still due to expire 300 s after it was computed, not after the last hit.
+        clock[0] = 350
+        predictor_logic._CONTENT_CACHE.clear()
+        predict_url_classes(['https://shop.example.com/'])
+        self.assertEqual(get.call_count, 2)
+
+
+class StringFeatureTests(TestCase):
+    def test_numeric_chars_include_non_ascii_digits(self):
+        ascii_features, _ = predictor_logic.extract_string_features('https://example.com/a1b22')
+        unicode_features, _ = predictor_logic.extract_string_features('https://例え.jp/١٢٣')
+
+        self.assertEqual(ascii_features.NumNumericChars, 3)
+        self.assertEqual(unicode_features.NumNumericChars, 3)
+
+
+class ContentFeatureTests(TestCase):
+    def content_features(self, body, url='https://shop.example.com/'):
+        return predictor_logic.compute_content_features(body, urlparse(url))
+
+    def test_plain_js_and_mailto_markers(self):
+        features = self.content_features(
+            b'<html><body><a href="mailto:x@example.com">Mail</a>'
+            b'<script>window.open("https://example.org/")</script></body></html>')
+
+        self.assertEqual(features.get('SubmitInfoToEmail'), 1)
+        self.assertEqual(features.get('PopUpWindow'), 1)
+
+    def test_entity_encoded_markers_are_detected(self):
+        features = self.content_features(
+            b'<html><body><a href="&#109;ailto:x@example.com">Mail</a>'
+            b'<button onclick="w&#x69;ndow.open(\'https://example.org/\')">Go</button>'
+            b'<div oncontextmenu="return false">x</div></body></html>')
+
+        self.assertEqual(features.get('SubmitInfoToEmail'), 1)
+        self.assertEqual(features.get('PopUpWindow'), 1)
+        self.assertEqual(features.get('RightClickDisabled'), 1)
+
+    def test_common_entities_do_not_raise_markers(self):
+        features = self.content_features(
+            b'<html><body><p>Tom &amp; Jerry&#39;s &nbsp; shop</p></body></html>')
+
+        for name in ('SubmitInfoToEmail', 'PopUpWindow', 'RightClickDisabled'):
+            self.assertNotIn(name, features)
+
+    def test_hrefs_split_by_newlines_are_still_external(self):
+        # urlparse strips tab/CR/LF like browsers do, so these all point at evil.example.
+        features = self.content_features(
+            b'<html><head><link rel="icon" href="/\n/evil.example/favicon.ico"></head><body>'
+            b'<a href="/\n/evil.example/x">Sign in</a><img src="/\t/evil.example/logo.png"></body></html>')
+
+        self.assertEqual(features.get('PctExtHyperlinks'), 1.0)
+        self.assertEqual(features.get('PctExtResourceUrls'), 1.0)
+        self.assertEqual(features.get('ExtFavicon'), 1)